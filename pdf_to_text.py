@@ -1,24 +1,68 @@
+import asyncio
+import hashlib
+import json
 import os
 import fitz  # PyMuPDF
-from typing import Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from tempfile import TemporaryDirectory
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, Union
 
 from pathlib import Path
 
 try:
-    import pdfminer.high_level
+    from pdfminer.high_level import extract_text as _pdfminer_extract_text
 except ImportError:
-    pdfminer = None
+    _pdfminer_extract_text = None
 try:
     import pytesseract
-    from PIL import Image
 except ImportError:
     pytesseract = None
-    Image = None
+# Optional OCR backends, deliberately left out of requirements.txt; see
+# extract_pages_with_ocr for how they are chosen.
+try:
+    import aiopytesseract
+except ImportError:
+    aiopytesseract = None
+try:
+    from tesserocr import PyTessBaseAPI
+except ImportError:
+    PyTessBaseAPI = None
+
+_SECTION_MARKER = "***Card Detail"
+# Line-break characters str.splitlines() recognises besides '\n'.
+_LINE_BREAKS = "\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+
+# OCR rendering resolution and Tesseract page segmentation mode (6: a single
+# uniform block of text).
+_OCR_DPI = 200
+_OCR_PSM = 6
+# Pages per Tesseract invocation; much larger image lists can hang it.
+_OCR_BATCH_SIZE = 50
+# Concurrent Tesseract subprocesses per process; pool workers lower it via
+# _init_worker so the whole pool stays within the CPU count.
+_ocr_concurrency = os.cpu_count() or 1
+
+# Per-output-directory record of processed inputs, used by skip_unchanged:
+# {pdf name: [mtime_ns, size, use_ocr, sha1 of the .txt output]}.
+_MANIFEST_NAME = "processed.json"
+
+# In-process LRU of card numbers per (resolved path, mtime_ns, size, use_ocr),
+# so repeated calls on unchanged files skip parsing. Kept in the parent
+# process, since pool workers do not outlive a pdf_to_text call.
+_RESULT_CACHE_SIZE = 1024
+_result_cache = OrderedDict()
+# Same results keyed on (blake2b of the PDF bytes, use_ocr), consulted when the
+# stat key misses: re-saving or copying a PDF changes its mtime or path but not
+# its contents.
+_content_cache = OrderedDict()
 
 def pdf_to_text(
     input_path: Union[str, Path],
     output_dir: Union[str, Path] = "output_txt",
-    use_ocr: bool = True
+    use_ocr: bool = True,
+    skip_unchanged: bool = False
 ):
     """
     Extracts text from one or many PDF files and saves them as .txt files in output_dir.
@@ -28,99 +72,364 @@ def pdf_to_text(
         input_path (str|Path): Path to PDF file or directory containing PDFs.
         output_dir (str|Path): Directory to save .txt files (will be created).
         use_ocr (bool): If True, tries OCR on pages with no text.
+        skip_unchanged (bool): If True, skips PDFs whose mtime, size and
+            use_ocr match the manifest in output_dir and whose .txt output
+            is untouched.
     """
     input_path = Path(input_path)
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
     
     if input_path.is_dir():
-        pdf_files = list(input_path.glob("*.pdf"))
+        pdf_files = [
+            Path(e.path) for e in os.scandir(input_path)
+            if e.is_file() and e.name.lower().endswith(".pdf")
+        ]
     elif input_path.is_file() and input_path.suffix.lower() == ".pdf":
         pdf_files = [input_path]
     else:
         raise ValueError(f"Path {input_path} is not a PDF or directory of PDFs.")
 
+    stats = {pdf_file: pdf_file.stat() for pdf_file in pdf_files}
+
+    if skip_unchanged:
+        manifest_path = output_dir / _MANIFEST_NAME
+        manifest = _load_manifest(manifest_path)
+        pending = []
+        for pdf_file in pdf_files:
+            st = stats[pdf_file]
+            entry = manifest.get(pdf_file.name)
+            out_path = output_dir / (pdf_file.stem + ".txt")
+            if (
+                isinstance(entry, list)
+                and len(entry) == 4
+                and entry[:3] == [st.st_mtime_ns, st.st_size, use_ocr]
+                and out_path.is_file()
+                and _file_sha1(out_path) == entry[3]
+            ):
+                print(f"[SKIP] {pdf_file.name} unchanged")
+            else:
+                pending.append(pdf_file)
+        pdf_files = pending
+
+    # Files whose bytes were already parsed by an earlier call in this process
+    # are written straight from the result caches.
+    result_keys = {}
+    content_keys = {}
+    to_parse = []
     for pdf_file in pdf_files:
-        text = ""
-        try:
-            text = extract_with_pymupdf(pdf_file)
-            if not text.strip():
-                if pdfminer:
-                    text = extract_with_pdfminer(pdf_file)
-        except Exception as e:
-            if pdfminer:
-                text = extract_with_pdfminer(pdf_file)
-        
+        st = stats[pdf_file]
+        key = (str(pdf_file.resolve()), st.st_mtime_ns, st.st_size, use_ocr)
+        card_numbers = _cached_result(_result_cache, key)
+        if card_numbers is None:
+            content_key = (
+                hashlib.blake2b(pdf_file.read_bytes(), digest_size=16).digest(),
+                use_ocr,
+            )
+            card_numbers = _cached_result(_content_cache, content_key)
+            if card_numbers is None:
+                result_keys[pdf_file] = key
+                content_keys[pdf_file] = content_key
+                to_parse.append(pdf_file)
+                continue
+            _store_result(_result_cache, key, card_numbers)
+        _write_card_numbers(pdf_file, output_dir, card_numbers, cached=True)
+
+    process = partial(_process_one_pdf, output_dir=output_dir, use_ocr=use_ocr)
+    max_workers = min(len(to_parse), os.cpu_count() or 1, 8)
+    if max_workers <= 1:
+        # Not worth a pool: under spawn each worker is a fresh interpreter
+        # re-importing fitz and pdfminer.
+        results = [process(pdf_file) for pdf_file in to_parse]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(max_workers,),
+        ) as ex:
+            # Each worker opens its own fitz.Document; per-PDF cost is high and
+            # uneven, so hand out one file at a time.
+            results = list(ex.map(process, to_parse, chunksize=1))
+    for pdf_file, card_numbers in zip(to_parse, results):
+        _store_result(_result_cache, result_keys[pdf_file], card_numbers)
+        _store_result(_content_cache, content_keys[pdf_file], card_numbers)
+
+    if skip_unchanged:
+        for pdf_file in pdf_files:
+            st = stats[pdf_file]
+            out_path = output_dir / (pdf_file.stem + ".txt")
+            manifest[pdf_file.name] = [
+                st.st_mtime_ns, st.st_size, use_ocr, _file_sha1(out_path)
+            ]
+        _save_manifest(manifest_path, manifest)
+
+def _init_worker(max_workers: int):
+    global _ocr_concurrency
+    _ocr_concurrency = max(1, (os.cpu_count() or 1) // max_workers)
+    # Each Tesseract process would otherwise start one OpenMP thread per core.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+def _cached_result(cache: OrderedDict, key: tuple) -> Optional[tuple]:
+    card_numbers = cache.get(key)
+    if card_numbers is not None:
+        cache.move_to_end(key)
+    return card_numbers
+
+def _store_result(cache: OrderedDict, key: tuple, card_numbers: tuple):
+    cache[key] = card_numbers
+    if len(cache) > _RESULT_CACHE_SIZE:
+        cache.popitem(last=False)
+
+def _load_manifest(manifest_path: Path) -> dict:
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # A hand-edited or foreign file may parse as something other than a dict.
+    return manifest if isinstance(manifest, dict) else {}
+
+def _save_manifest(manifest_path: Path, manifest: dict):
+    # Write to a sibling file first so an interrupted run never leaves a
+    # truncated manifest behind.
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def _file_sha1(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+def _process_one_pdf(pdf_file: Path, output_dir: Path, use_ocr: bool):
+    """
+    Extracts card numbers from a single PDF, writes them to output_dir and
+    returns them. Top-level so it can be pickled by ProcessPoolExecutor.
+    """
+    ocr_available = use_ocr and (
+        PyTessBaseAPI or aiopytesseract or pytesseract
+    )
+    page_texts = []
+    pymupdf_pages = extract_with_pymupdf(pdf_file)
+
+    def _pages():
+        for page_text in pymupdf_pages:
+            page_texts.append(page_text)
+            yield page_text
+
+    try:
+        card_numbers, complete = _scan_pages(_pages())
+        seen_text = any(t.strip() for t in page_texts)
+    except Exception as e:
+        seen_text = complete = False
+    finally:
+        # The scan may stop early; close the document now rather than at GC.
+        pymupdf_pages.close()
+
+    if not seen_text:
+        text = extract_with_pdfminer(pdf_file)
         # OCR Fallback if all else fails or empty text
-        if use_ocr and (not text.strip()) and pytesseract and Image:
+        if ocr_available and not text.strip():
             text = extract_with_ocr(pdf_file)
-        
         # Instead of saving all text, extract card numbers only
         card_numbers = extract_card_numbers_from_text(text)
-        # Ensure only unique card numbers, preserving order
-        unique_card_numbers = list(dict.fromkeys(card_numbers))
-        
-        out_path = output_dir / (pdf_file.stem + ".txt")
-        with open(out_path, "w", encoding="utf-8") as f:
-            for num in unique_card_numbers:
-                f.write(num + "\n")
-        print(f"[OK] {pdf_file.name} -> {out_path}")
-
-def extract_with_pymupdf(pdf_file: Path) -> str:
-    doc = fitz.open(str(pdf_file))
-    text = []
-    for page in doc:
-        text.append(page.get_text())
-    return "\n".join(text)
+    elif ocr_available and not complete:
+        # Mixed text/image PDF whose text pages don't hold a finished card
+        # section: OCR only the pages PyMuPDF found no text on, then rescan.
+        ocr_needed = [i for i, t in enumerate(page_texts) if not t.strip()]
+        if ocr_needed:
+            for i, t in zip(ocr_needed, extract_pages_with_ocr(pdf_file, ocr_needed)):
+                page_texts[i] = t
+            card_numbers = extract_card_numbers_streaming(page_texts)
+
+    card_numbers = tuple(card_numbers)
+    _write_card_numbers(pdf_file, output_dir, card_numbers)
+    return card_numbers
+
+def _write_card_numbers(pdf_file: Path, output_dir: Path, card_numbers: tuple, cached: bool = False):
+    out_path = output_dir / (pdf_file.stem + ".txt")
+    # One write for the whole file; keeps the trailing newline per card.
+    out_path.write_text(
+        "\n".join(card_numbers) + ("\n" if card_numbers else ""), encoding="utf-8"
+    )
+    print(f"[OK] {pdf_file.name} -> {out_path}" + (" (cached)" if cached else ""))
+
+def extract_with_pymupdf(pdf_file: Path) -> Iterator[str]:
+    """
+    Yields the text of each page in turn, so callers can stop reading early.
+    Only the plain character stream is needed, so ligature and whitespace
+    preservation are off; the other default flags stay on, so text outside
+    the page is skipped and glyphs without a Unicode mapping (such as tabs)
+    keep their character code instead of becoming U+FFFD. Dehyphenation stays
+    off to keep the '-' in card numbers intact.
+    """
+    flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES & ~fitz.TEXT_PRESERVE_WHITESPACE
+    with fitz.open(str(pdf_file)) as doc:
+        for page in doc:
+            yield page.get_text("text", flags=flags)
 
 def extract_with_pdfminer(pdf_file: Path) -> str:
+    if _pdfminer_extract_text is None:
+        return ""
     try:
-        from pdfminer.high_level import extract_text
-        return extract_text(str(pdf_file))
+        return _pdfminer_extract_text(str(pdf_file))
     except Exception as e:
         print(f"[WARN] PDFMiner failed: {e}")
         return ""
 
 def extract_with_ocr(pdf_file: Path) -> str:
-    from tempfile import TemporaryDirectory
-    import fitz
-    if not (pytesseract and Image):
-        return ""
-    doc = fitz.open(str(pdf_file))
-    text = []
-    with TemporaryDirectory() as tmpdir:
-        for i, page in enumerate(doc):
-            pix = page.get_pixmap()
-            img_path = os.path.join(tmpdir, f"page_{i}.png")
-            pix.save(img_path)
-            img = Image.open(img_path)
-            page_text = pytesseract.image_to_string(img, lang="eng")
-            text.append(page_text)
-    return "\n".join(text)
+    return "\n".join(extract_pages_with_ocr(pdf_file))
+
+def extract_pages_with_ocr(pdf_file: Path, page_numbers: Optional[Sequence[int]] = None) -> list:
+    """
+    OCRs the given pages (all pages by default) and returns their texts in order.
+
+    Backends, in order of preference: tesserocr (one in-process engine),
+    aiopytesseract (concurrent subprocesses, opt-in), then the default
+    pytesseract path that batches up to 50 pages per Tesseract run.
+    """
+    with fitz.open(str(pdf_file)) as doc:
+        if page_numbers is None:
+            page_numbers = range(doc.page_count)
+        if PyTessBaseAPI:
+            # One in-process Tesseract engine for every page: no subprocess
+            # spawn or model load per page.
+            text = []
+            with PyTessBaseAPI(lang="eng", psm=_OCR_PSM) as api:
+                for i in page_numbers:
+                    pix = _render_page(doc[i])
+                    api.SetImageBytes(pix.samples, pix.width, pix.height, pix.n, pix.stride)
+                    api.SetSourceResolution(_OCR_DPI)
+                    text.append(api.GetUTF8Text())
+            return text
+        if aiopytesseract:
+            page_bytes = [_render_page(doc[i]).tobytes("png") for i in page_numbers]
+            return asyncio.run(_ocr_pages(page_bytes))
+        if not pytesseract:
+            return [""] * len(page_numbers)
+        text = []
+        with TemporaryDirectory() as tmpdir:
+            # One Tesseract process per batch of pages rather than per page.
+            # Its multi-image input is a text file listing image paths, so the
+            # pages are rendered to PNG files; the output separates pages with
+            # form feeds.
+            for start in range(0, len(page_numbers), _OCR_BATCH_SIZE):
+                batch = page_numbers[start:start + _OCR_BATCH_SIZE]
+                img_paths = []
+                for i in batch:
+                    img_path = os.path.join(tmpdir, f"page_{i}.png")
+                    _render_page(doc[i]).save(img_path)
+                    img_paths.append(img_path)
+                list_path = os.path.join(tmpdir, "images.txt")
+                with open(list_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(img_paths) + "\n")
+                out = pytesseract.image_to_string(list_path, lang="eng", config=f"--psm {_OCR_PSM}")
+                pages = out.split("\f")[:len(batch)]
+                text.extend(pages + [""] * (len(batch) - len(pages)))
+        return text
+
+def _render_page(page) -> "fitz.Pixmap":
+    # 8-bit grayscale at 200 DPI: a fraction of the bytes of RGB(A), and
+    # sharper digits for Tesseract than the 72 DPI default.
+    return page.get_pixmap(dpi=_OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+
+async def _ocr_pages(page_bytes: list) -> list:
+    """
+    Runs one Tesseract subprocess per page concurrently, bounded by this
+    process's share of the CPUs.
+    """
+    sem = asyncio.Semaphore(_ocr_concurrency)
+
+    async def _ocr_one(png: bytes) -> str:
+        async with sem:
+            return await aiopytesseract.image_to_string(png, lang="eng", psm=_OCR_PSM)
+
+    return await asyncio.gather(*[_ocr_one(b) for b in page_bytes])
 
 def extract_card_numbers_from_text(text: str) -> list:
     """
     Extract card numbers under the '***Card Detail(s)***' section from OCR or extracted text.
+    Each card number is returned once, in order of first appearance.
+    """
+    # Jump straight to the marker with str.find; only the lines after it are
+    # split and scanned.
+    idx = text.find(_SECTION_MARKER)
+    if idx < 0:
+        return []
+    return _scan_lines(text[idx:].splitlines())[0]
+
+def _scan_lines(lines: Iterable[str]) -> Tuple[list, bool]:
+    """
+    Scans lines for the first '***Card Detail' section. Returns its unique
+    card numbers in order, and whether the line terminating it was seen.
     """
     result = []
-    lines = text.splitlines()
+    seen = set()
     in_card_section = False
-    for i, line in enumerate(lines):
-        if '***Card Detail' in line:
+    for line in lines:
+        if _SECTION_MARKER in line:
             in_card_section = True
             continue
-        if in_card_section:
-            # Look for end of section
-            if line.strip() == '' or line.startswith('_') or any(w in line for w in ['Invoice', 'Thank', 'see you']):
-                break
-            # Look for card number format
-            if any(char.isdigit() for char in line) and '-' in line:
-                card = line.split()[0]
-                # Optionally, verify format 0000-0000-0000-0000
-                if len(card.replace('-', '')) >= 8:  # Minimum for truncated cards
-                    result.append(card)
-    return result
-
-# Example usage (as importable function):
-from pdf_to_text import pdf_to_text
-pdf_to_text("/Users/mustafahaider/pdfOnderland/pdfs")
+        if not in_card_section:
+            continue
+        # Look for end of section
+        if (
+            not line.strip() or line.startswith("_")
+            or "Invoice" in line or "Thank" in line or "see you" in line
+        ):
+            return result, True
+        # Look for card number format: a digit and a '-' somewhere on the line
+        if "-" in line and any(map(str.isdigit, line)):
+            card = line.split(None, 1)[0]
+            # Minimum of 8 non-hyphen characters, for truncated cards
+            if len(card) - card.count("-") >= 8 and card not in seen:
+                seen.add(card)
+                result.append(card)
+    return result, False
+
+def extract_card_numbers_streaming(pages: Iterable[str]) -> list:
+    """
+    Same as extract_card_numbers_from_text on the newline-joined pages, but
+    consumes them lazily and stops pulling pages once the section has ended.
+    """
+    return _scan_pages(pages)[0]
+
+def _scan_pages(pages: Iterable[str]) -> Tuple[list, bool]:
+    # Returns the card numbers and whether the section's terminator was seen.
+    return _scan_lines(_joined_lines(pages))
+
+def _joined_lines(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Yields "\n".join(pages).splitlines() from the first page holding the
+    section marker on, one page at a time.
+    """
+    pages = iter(pages)
+    for page_text in pages:
+        # The marker never spans pages, so earlier pages only need a find.
+        idx = page_text.find(_SECTION_MARKER)
+        if idx >= 0:
+            buffer = page_text[idx:]
+            break
+    else:
+        return
+    while True:
+        lines = buffer.splitlines()
+        # Hold back the last line unless it is already ended: the next page may
+        # continue it, and a bare '\r' may pair with the joining '\n'.
+        carry = ""
+        if buffer and buffer[-1] not in _LINE_BREAKS + "\n":
+            carry = lines.pop()
+        elif buffer.endswith("\r"):
+            carry = lines.pop() + "\r"
+        yield from lines
+        page_text = next(pages, None)
+        if page_text is None:
+            break
+        buffer = carry + "\n" + page_text
+    if carry:
+        yield carry.rstrip("\r")
+
+# Example usage (also importable as a function). The guard matters: the
+# ProcessPoolExecutor workers re-import this module under the spawn start
+# method, and importing must not kick off another run.
+if __name__ == "__main__":
+    pdf_to_text("/Users/mustafahaider/pdfOnderland/pdfs")
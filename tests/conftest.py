@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# pdf_to_text.py lives at the repository root rather than in a package.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdf_to_text  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clear_result_caches():
+    # The in-process result caches would otherwise carry results across tests.
+    pdf_to_text._result_cache.clear()
+    pdf_to_text._content_cache.clear()
+    yield
@@ -0,0 +1,110 @@
+import random
+
+import fitz
+import pytest
+
+from pdf_to_text import (
+    extract_card_numbers_from_text, extract_card_numbers_streaming, pdf_to_text,
+)
+
+
+def baseline_extract(text: str) -> list:
+    """
+    The original line-by-line scan (plus the dedup pdf_to_text used to apply),
+    kept as the reference the extractor must agree with.
+    """
+    result = []
+    in_card_section = False
+    for line in text.splitlines():
+        if '***Card Detail' in line:
+            in_card_section = True
+            continue
+        if in_card_section:
+            if line.strip() == '' or line.startswith('_') or any(w in line for w in ['Invoice', 'Thank', 'see you']):
+                break
+            if any(char.isdigit() for char in line) and '-' in line:
+                card = line.split()[0]
+                if len(card.replace('-', '')) >= 8:
+                    result.append(card)
+    return list(dict.fromkeys(result))
+
+
+@pytest.mark.parametrize("text, expected", [
+    (
+        "Invoice 1\n***Card Details***\n1234-5678-9012-3456 20.00\n"
+        "1234-5678-9012-3456 5.00\n****-****-1234 1.00\n\nThank you",
+        ["1234-5678-9012-3456", "****-****-1234"],
+    ),
+    # pdfminer's page-break form feed ends the section like a blank line.
+    (
+        "***Card Details***\n1234-5678-9012-3456 x\n\x0c4321-8765-2109-6543 ref\n",
+        ["1234-5678-9012-3456"],
+    ),
+    # Bare carriage-return line endings.
+    (
+        "***Card Details***\r1234-5678-9012-3456 x\r4321-8765-2109-6543 y\r",
+        ["1234-5678-9012-3456", "4321-8765-2109-6543"],
+    ),
+    ("***Card Details***\r\n1234-5678-9012-3456 x\r\n\r\n9999-8888-7777-6666", ["1234-5678-9012-3456"]),
+    ("***Card Details***\n12-34 short\n1234-5678 ok\nInvoice 9999-8888-7777-6666", ["1234-5678"]),
+    ("no section here 1234-5678-9012-3456", []),
+    # str.isdigit() also accepts non-decimal digits such as superscripts.
+    ("***Card Detail\nabcdefgh-\u00b2 x\n", ["abcdefgh-\u00b2"]),
+])
+def test_known_texts(text, expected):
+    assert baseline_extract(text) == expected
+    assert extract_card_numbers_from_text(text) == expected
+
+
+_TOKENS = [
+    "***Card Detail(s)***", "1234-5678-9012-3456", "12-3", "****-****-1234",
+    "abc", "Invoice", "Thank you", "_", "", "  ", "-", "x1", "12345678",
+    "9-", "\t", "see you", "abcdefgh-\u00b2",
+    "\u0661\u0662\u0663\u0664-\u0665\u0666\u0667\u0668",
+]
+_BREAKS = [
+    "\n", "\n", "\n", "\r", "\r\n", "\x0c", "\x0b", "\x1c", "\x85", "\u2028", " ",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 8)):
+        parts.append(" ".join(rng.choice(_TOKENS) for _ in range(rng.randint(0, 3))))
+        parts.append(rng.choice(_BREAKS))
+    if parts and rng.random() < 0.5:
+        parts.pop()
+    return "".join(parts)
+
+
+def test_matches_baseline_on_random_texts():
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = _random_text(rng)
+        assert extract_card_numbers_from_text(text) == baseline_extract(text), repr(text)
+
+
+def test_streaming_matches_joined_pages():
+    rng = random.Random(1)
+    for _ in range(20000):
+        pages = [_random_text(rng) for _ in range(rng.randint(0, 4))]
+        expected = baseline_extract("\n".join(pages))
+        assert extract_card_numbers_streaming(iter(pages)) == expected, repr(pages)
+
+
+def test_pdf_with_tab_matches_baseline(tmp_path):
+    # The tab has no Unicode mapping in the default font; it must not turn into
+    # U+FFFD and glue the card number to the amount.
+    pdf = tmp_path / "a.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text(
+        (50, 72), "***Card Detail(s)***\n1234-5678-9012-3456\t20.00\n\nThank you"
+    )
+    doc.save(str(pdf))
+    expected = baseline_extract("\n".join(page.get_text() for page in doc))
+    doc.close()
+
+    pdf_to_text(pdf, tmp_path / "out", use_ocr=False)
+
+    assert expected == ["1234-5678-9012-3456"]
+    assert (tmp_path / "out" / "a.txt").read_text() == "1234-5678-9012-3456\n"
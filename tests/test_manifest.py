@@ -0,0 +1,47 @@
+import json
+
+import fitz
+
+from pdf_to_text import _MANIFEST_NAME, _content_cache, _result_cache, pdf_to_text
+
+
+def _make_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _run(pdf, out, **kwargs):
+    # The in-process result caches would serve repeat runs on their own.
+    _result_cache.clear()
+    _content_cache.clear()
+    pdf_to_text(pdf, out, **kwargs)
+
+
+def test_skip_unchanged_respects_use_ocr(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, "***Card Detail(s)***\n1234-5678-9012-3456 x\n\nThank you")
+
+    _run(pdf, out, use_ocr=False, skip_unchanged=True)
+    assert (out / "a.txt").read_text() == "1234-5678-9012-3456\n"
+    capsys.readouterr()
+
+    _run(pdf, out, use_ocr=False, skip_unchanged=True)
+    assert "[SKIP] a.pdf" in capsys.readouterr().out
+
+    _run(pdf, out, use_ocr=True, skip_unchanged=True)
+    assert "[SKIP]" not in capsys.readouterr().out
+
+
+def test_non_dict_manifest_is_ignored(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / _MANIFEST_NAME).write_text("[1, 2, 3]")
+    _make_pdf(pdf, "nothing here")
+
+    _run(pdf, out, skip_unchanged=True)
+
+    assert isinstance(json.loads((out / _MANIFEST_NAME).read_text()), dict)
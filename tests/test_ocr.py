@@ -0,0 +1,96 @@
+import fitz
+
+import pdf_to_text
+
+
+def _make_blank_pdf(path, pages):
+    _make_pdf(path, [""] * pages)
+
+
+def _make_pdf(path, page_texts):
+    # Empty strings give image-only (text-less) pages.
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        if text:
+            page.insert_text((50, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _fake_ocr(monkeypatch, page_texts):
+    calls = []
+
+    def extract_pages_with_ocr(pdf_file, page_numbers=None):
+        calls.append(list(page_numbers))
+        return [page_texts[i] for i in page_numbers]
+
+    # Any backend counts as available; the OCR itself is faked.
+    monkeypatch.setattr(pdf_to_text, "pytesseract", object())
+    monkeypatch.setattr(pdf_to_text, "extract_pages_with_ocr", extract_pages_with_ocr)
+    return calls
+
+
+class _FakePytesseract:
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.batches = []
+
+    def image_to_string(self, list_path, lang, config):
+        with open(list_path, encoding="utf-8") as f:
+            self.batches.append([line.rsplit("page_", 1)[1] for line in f.read().split()])
+        return self.outputs.pop(0)
+
+
+def test_batched_pytesseract_splits_and_pads_pages(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    _make_blank_pdf(pdf, 4)
+    # Tesseract may drop the trailing form feeds of empty pages.
+    fake = _FakePytesseract(["a\fb", "c\fd\fextra"])
+    monkeypatch.setattr(pdf_to_text, "PyTessBaseAPI", None)
+    monkeypatch.setattr(pdf_to_text, "aiopytesseract", None)
+    monkeypatch.setattr(pdf_to_text, "pytesseract", fake)
+    monkeypatch.setattr(pdf_to_text, "_OCR_BATCH_SIZE", 3)
+
+    assert pdf_to_text.extract_pages_with_ocr(pdf) == ["a", "b", "", "c"]
+    assert fake.batches == [["0.png", "1.png", "2.png"], ["3.png"]]
+
+
+def test_no_ocr_backend_gives_empty_pages(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    _make_blank_pdf(pdf, 2)
+    monkeypatch.setattr(pdf_to_text, "PyTessBaseAPI", None)
+    monkeypatch.setattr(pdf_to_text, "aiopytesseract", None)
+    monkeypatch.setattr(pdf_to_text, "pytesseract", None)
+
+    assert pdf_to_text.extract_pages_with_ocr(pdf, [1]) == [""]
+
+
+def test_only_blank_pages_are_ocred_then_rescanned(tmp_path, monkeypatch, capsys):
+    pdf = tmp_path / "mixed.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, ["Invoice 42", "", "Page 3"])
+    calls = _fake_ocr(monkeypatch, {
+        1: "***Card Detail(s)***\n1234-5678-9012-3456 x\n\nThank you\n",
+    })
+
+    pdf_to_text.pdf_to_text(pdf, out)
+    assert calls == [[1]]
+    assert (out / "mixed.txt").read_text() == "1234-5678-9012-3456\n"
+    capsys.readouterr()
+
+    pdf_to_text.pdf_to_text(pdf, out)
+    assert calls == [[1]]
+    assert "(cached)" in capsys.readouterr().out
+
+
+def test_complete_section_skips_ocr(tmp_path, monkeypatch):
+    pdf = tmp_path / "text.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, ["***Card Detail(s)***\n1234-5678-9012-3456 x\n\nThank you", ""])
+    calls = _fake_ocr(monkeypatch, {})
+
+    pdf_to_text.pdf_to_text(pdf, out)
+
+    assert calls == []
+    assert (out / "text.txt").read_text() == "1234-5678-9012-3456\n"
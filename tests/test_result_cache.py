@@ -0,0 +1,101 @@
+import os
+
+import fitz
+
+from pdf_to_text import pdf_to_text
+
+_TEXT = "***Card Detail(s)***\n1234-5678-9012-3456 x\n\nThank you"
+
+
+def _make_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 72), text)
+    # Uncompressed content streams, so tests can patch the text bytes.
+    doc.save(str(path), expand=255)
+    doc.close()
+
+
+def _set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_repeat_call_is_cached(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, _TEXT)
+
+    pdf_to_text(pdf, out, use_ocr=False)
+    assert "(cached)" not in capsys.readouterr().out
+    (out / "a.txt").unlink()
+
+    pdf_to_text(pdf, out, use_ocr=False)
+    assert "(cached)" in capsys.readouterr().out
+    assert (out / "a.txt").read_text() == "1234-5678-9012-3456\n"
+
+
+def test_changed_mtime_and_bytes_same_size_is_reparsed(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, _TEXT)
+    _set_mtime(pdf, 10**18)
+    size = pdf.stat().st_size
+    pdf_to_text(pdf, out, use_ocr=False)
+    capsys.readouterr()
+
+    # Patch the last digit in place (the uncompressed text is hex-encoded) so
+    # only the mtime tells the stat keys apart.
+    data = pdf.read_bytes()
+    assert data.count(b"33343536") == 1
+    pdf.write_bytes(data.replace(b"33343536", b"33343537"))
+    _set_mtime(pdf, 10**18 + 10**9)
+    assert pdf.stat().st_size == size
+    pdf_to_text(pdf, out, use_ocr=False)
+
+    assert "(cached)" not in capsys.readouterr().out
+    assert (out / "a.txt").read_text() == "1234-5678-9012-3457\n"
+
+
+def test_changed_size_is_reparsed(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, _TEXT)
+    _set_mtime(pdf, 10**18)
+    pdf_to_text(pdf, out, use_ocr=False)
+    capsys.readouterr()
+
+    # Same mtime, so only the size tells the files apart.
+    _make_pdf(pdf, _TEXT.replace("x\n", "x\n4321-8765-2109-6543 y\n"))
+    _set_mtime(pdf, 10**18)
+    pdf_to_text(pdf, out, use_ocr=False)
+
+    assert "(cached)" not in capsys.readouterr().out
+    assert (out / "a.txt").read_text() == "1234-5678-9012-3456\n4321-8765-2109-6543\n"
+
+
+def test_use_ocr_is_part_of_the_key(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, _TEXT)
+
+    pdf_to_text(pdf, out, use_ocr=False)
+    capsys.readouterr()
+    pdf_to_text(pdf, out, use_ocr=True)
+    assert "(cached)" not in capsys.readouterr().out
+    pdf_to_text(pdf, out, use_ocr=True)
+    assert "(cached)" in capsys.readouterr().out
+
+
+def test_resave_with_same_bytes_is_cached(tmp_path, capsys):
+    pdf = tmp_path / "a.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf, _TEXT)
+
+    pdf_to_text(pdf, out, use_ocr=False)
+    assert "(cached)" not in capsys.readouterr().out
+
+    # Same bytes under a new mtime, as an editor re-save would leave it.
+    _set_mtime(pdf, pdf.stat().st_mtime_ns + 10**9)
+    (out / "a.txt").unlink()
+    pdf_to_text(pdf, out, use_ocr=False)
+    assert "(cached)" in capsys.readouterr().out
+    assert (out / "a.txt").read_text() == "1234-5678-9012-3456\n"